@@ -6,26 +6,81 @@ AI助手后台服务
 提供以下接口：
 - GET  /api/health   - 健康检查
 - GET  /api/context  - 获取上下文数据
+- POST /api/context/invalidate - 清空上下文缓存
 - POST /api/chat     - 聊天接口（流式响应）
 
 启动方式：
     python backend_server.py
 
-或使用 gunicorn（生产环境）：
-    gunicorn -w 4 -b 0.0.0.0:8100 backend_server:app
+或使用 gunicorn（生产环境，gevent worker，配置见 gunicorn.conf.py）：
+    gunicorn -c gunicorn.conf.py backend_server:app
 """
 
 import os
+import sys
 import json
+import atexit
+import logging
 import base64
+import gzip
+import time
+import queue
+import tempfile
+import threading
+from contextlib import contextmanager
+from functools import lru_cache, wraps
+from urllib.parse import quote
+from logging.handlers import QueueHandler, QueueListener
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from flask import Flask, request, Response, jsonify
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 
+# JSON 加速（可选，未安装 orjson 时回退到标准库 json）
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 响应压缩（可选，未安装 flask-compress 时不压缩）
+try:
+    from flask_compress import Compress
+except ImportError:
+    Compress = None
+
+# ==================== 日志 ====================
+
+class _DroppingQueueHandler(QueueHandler):
+    """队列已满时直接丢弃日志，保证请求处理不会因日志堆积而阻塞"""
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+
+# 日志格式化和写 stderr 在后台线程中完成，请求处理中只做一次入队操作
+_log_queue = queue.Queue(maxsize=10000)
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s %(message)s'))
+_log_listener = QueueListener(_log_queue, _log_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+logger = logging.getLogger('backend_server')
+logger.setLevel(logging.INFO)
+logger.addHandler(_DroppingQueueHandler(_log_queue))
+logger.propagate = False
+
 # 数据库支持（可选，根据需要启用）
 DB_TYPE = os.environ.get('DB_TYPE', 'file')  # file, mysql, sqlite
 
 if DB_TYPE == 'mysql':
+    # 后台服务固定使用纯 Python 的 pymysql：gevent worker 下其网络 I/O 可以切换协程，
+    # 而 mysqlclient（C 扩展）的查询会阻塞整个 worker（即使已安装 mysqlclient 也不使用）
     import pymysql
     pymysql.install_as_MySQLdb()
     from sqlalchemy import create_engine, text
@@ -33,9 +88,47 @@ if DB_TYPE == 'mysql':
 elif DB_TYPE == 'sqlite':
     import sqlite3
 
+
+# ==================== JSON 序列化 ====================
+
+def json_loads(data):
+    """解析 JSON（str 或 bytes），优先使用 orjson"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps_bytes(obj):
+    """序列化为 UTF-8 编码的 JSON bytes，优先使用 orjson"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """使用 orjson 的 Flask JSON 序列化器，jsonify 和 request.json 均使用此实现"""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 app = Flask(__name__)
-# 启用跨域支持
-CORS(app)
+if orjson is not None:
+    app.json = OrjsonProvider(app)
+
+# 启用响应压缩：只压缩 JSON 响应（/api/context、/api/tools_prompt 等），
+# 流式响应不压缩，避免 SSE 数据被压缩缓冲而无法实时推送
+if Compress is not None:
+    app.config['COMPRESS_MIMETYPES'] = ['application/json']
+    app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+    app.config['COMPRESS_LEVEL'] = 4
+    app.config['COMPRESS_BR_LEVEL'] = 4
+    app.config['COMPRESS_MIN_SIZE'] = 1024
+    app.config['COMPRESS_STREAMS'] = False
+    Compress(app)
 
 # ==================== 配置 ====================
 
@@ -44,16 +137,76 @@ DEEPSEEK_API_KEY = os.environ.get('DEEPSEEK_API_KEY', '')
 DEEPSEEK_API_URL = 'https://api.deepseek.com/v1/chat/completions'
 DEEPSEEK_MODEL = 'deepseek-chat'
 
+# DeepSeek 请求头在启动时构建一次（未配置 API Key 时聊天接口会直接返回 500，不会使用该请求头）
+DEEPSEEK_HEADERS = {
+    'Authorization': f'Bearer {DEEPSEEK_API_KEY}',
+    'Content-Type': 'application/json'
+}
+
+# DeepSeek 请求复用同一个 Session，保持 HTTPS 长连接，避免每次请求都重新握手
+# 重试只针对请求尚未被上游处理的情况：建立连接失败，以及限流返回的 429；
+# 请求发出后的读取失败、其他错误和 5xx 都不重试（5xx 时模型可能已完成生成，重发会重复计费并增加延迟）
+deepseek_session = requests.Session()
+deepseek_session.mount('https://', HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=128,
+    max_retries=Retry(
+        total=2,
+        connect=2,
+        read=0,
+        other=0,
+        status=1,
+        backoff_factor=0.2,
+        status_forcelist=(429,),
+        allowed_methods=frozenset(['POST']),
+        raise_on_status=False
+    )
+))
+
+# 转发流式响应时单次读取的最大字节数（上游为分块传输，数据到达即转发，不会等待读满；
+# 转发时按完整 SSE 事件切分，见 chat() 中的 generate_stream）
+STREAM_CHUNK_SIZE = 16384
+
+# 请求体中固定不变的部分，启动时编码一次
+_CHAT_BODY_PREFIX = b'{"model":' + json_dumps_bytes(DEEPSEEK_MODEL) + b',"messages":'
+
+
+def build_chat_request_body(messages, stream, temperature, max_tokens):
+    """
+    构造 DeepSeek 请求体（JSON bytes）
+    只序列化随请求变化的字段，拼接到预先编码好的固定前缀之后
+    """
+    return b''.join((
+        _CHAT_BODY_PREFIX, json_dumps_bytes(messages),
+        b',"stream":', json_dumps_bytes(stream),
+        b',"temperature":', json_dumps_bytes(temperature),
+        b',"max_tokens":', json_dumps_bytes(max_tokens),
+        b'}'
+    ))
+
 # 服务器配置
 SERVER_HOST = os.environ.get('SERVER_HOST', '0.0.0.0')
 SERVER_PORT = int(os.environ.get('SERVER_PORT', 8100))
 DEBUG_MODE = os.environ.get('DEBUG_MODE', 'false').lower() == 'true'
 
+# 跨域支持：生产环境由 Nginx 添加 CORS 头并直接应答 OPTIONS 预检（见 deploy/nginx.conf），
+# 调试模式下或未部署 Nginx 时（APP_CORS=true）由后台自行处理
+APP_CORS = os.environ.get('APP_CORS', str(DEBUG_MODE)).lower() == 'true'
+if APP_CORS:
+    CORS(app)
+
+# 请求体大小上限（字节），超过时直接返回 413，不读取请求体
+MAX_REQUEST_BODY_BYTES = int(os.environ.get('MAX_REQUEST_BODY_BYTES', 1024 * 1024))
+app.config['MAX_CONTENT_LENGTH'] = MAX_REQUEST_BODY_BYTES
+
 # 上下文数据文件路径（可配置）
 CONTEXT_FILE_PATH = os.environ.get('CONTEXT_FILE_PATH', 'context_data.json')
 
 # 访问秘钥配置（可以设置多个秘钥，用逗号分隔）
-VALID_ACCESS_KEYS = os.environ.get('VALID_ACCESS_KEYS', 'demo-key-123').split(',')
+# 启动时解析为去除首尾空白的秘钥集合，验证时 O(1) 查找
+VALID_ACCESS_KEYS = frozenset(
+    k.strip() for k in os.environ.get('VALID_ACCESS_KEYS', 'demo-key-123').split(',') if k.strip()
+)
 
 # ==================== 数据库配置 ====================
 
@@ -64,18 +217,160 @@ MYSQL_USER = os.environ.get('MYSQL_USER', 'root')
 MYSQL_PASSWORD = os.environ.get('MYSQL_PASSWORD', '')
 MYSQL_DATABASE = os.environ.get('MYSQL_DATABASE', 'ai_assistant')
 
+# MySQL 连接池配置
+# 每个 gunicorn worker 各有一个连接池，整台服务器的连接数为 worker 数 × (pool_size + max_overflow)。
+# 按 DB_MAX_CONNECTIONS（整台服务器的连接总数，需小于 MySQL 的 max_connections，默认 151）
+# 平均分给各 worker，单独设置的 DB_POOL_SIZE / DB_MAX_OVERFLOW 也不会超过分到的份额；
+# worker 数由 gunicorn.conf.py 的 post_fork 钩子按实际生效的值（包括命令行 -w）写入 GUNICORN_WORKERS，直接运行时为 1
+DB_MAX_CONNECTIONS = int(os.environ.get('DB_MAX_CONNECTIONS', 100))
+_DB_WORKER_COUNT = max(1, int(os.environ.get('GUNICORN_WORKERS', 1)))
+# 每个连接池至少 1 个常驻连接（SQLAlchemy 中 pool_size=0 表示不限制），worker 数超过连接总数时无法满足上限
+_DB_CONNECTIONS_PER_WORKER = max(1, DB_MAX_CONNECTIONS // _DB_WORKER_COUNT)
+DB_POOL_SIZE = max(1, min(int(os.environ.get('DB_POOL_SIZE', _DB_CONNECTIONS_PER_WORKER // 2)),
+                          _DB_CONNECTIONS_PER_WORKER))
+DB_MAX_OVERFLOW = max(0, min(int(os.environ.get('DB_MAX_OVERFLOW', _DB_CONNECTIONS_PER_WORKER - DB_POOL_SIZE)),
+                             _DB_CONNECTIONS_PER_WORKER - DB_POOL_SIZE))
+DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 10))
+DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))  # 小于 MySQL wait_timeout
+
 # SQLite 配置
 SQLITE_PATH = os.environ.get('SQLITE_PATH', 'report_context.db')
 
+# 数据库查询结果缓存配置（秒），设置为 0 关闭缓存
+DB_CACHE_TTL = int(os.environ.get('DB_CACHE_TTL', 60))
+DB_CACHE_MAXSIZE = int(os.environ.get('DB_CACHE_MAXSIZE', 256))
+# 缓存失效标记文件：gunicorn 的每个 worker 各有一份缓存，调用清空接口时向该文件写入新的标记值，
+# 各 worker 读缓存时发现标记值变化即清空自己的缓存；多台服务器部署时需指向共享存储
+DB_CACHE_INVALIDATE_FILE = os.environ.get(
+    'DB_CACHE_INVALIDATE_FILE',
+    os.path.join(tempfile.gettempdir(), 'ai_assistant_db_cache.stamp')
+)
+
 # 数据库连接池（MySQL）
 db_engine = None
 if DB_TYPE == 'mysql':
     try:
         db_url = f"mysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DATABASE}?charset=utf8mb4"
-        db_engine = create_engine(db_url, poolclass=QueuePool, pool_size=5, max_overflow=10)
-        print(f"MySQL connection pool created: {MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DATABASE}")
+        db_engine = create_engine(
+            db_url,
+            poolclass=QueuePool,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=True
+        )
+        logger.info("MySQL connection pool created: %s:%s/%s "
+                    "(pool_size=%s, max_overflow=%s, pool_timeout=%ss, pool_recycle=%ss)",
+                    MYSQL_HOST, MYSQL_PORT, MYSQL_DATABASE,
+                    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE)
+        if _DB_WORKER_COUNT > DB_MAX_CONNECTIONS:
+            logger.warning("GUNICORN_WORKERS (%s) exceeds DB_MAX_CONNECTIONS (%s); "
+                           "each worker still keeps one MySQL connection",
+                           _DB_WORKER_COUNT, DB_MAX_CONNECTIONS)
     except Exception as e:
-        print(f"Failed to create MySQL connection: {e}")
+        logger.error("Failed to create MySQL connection: %s", e)
+
+# 数据库连接池（SQLite）
+# 用有界队列复用连接，避免每次请求都重新打开数据库文件；同时适用于多线程和 gevent
+SQLITE_POOL_SIZE = int(os.environ.get('SQLITE_POOL_SIZE', 8))
+# 内存映射读取的上限（字节），查询时直接读取映射的页面而不是逐页 read，0 表示关闭
+SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+_sqlite_pool = queue.Queue(maxsize=SQLITE_POOL_SIZE)
+
+
+@contextmanager
+def sqlite_connection():
+    """
+    从连接池获取 SQLite 连接，使用完毕后归还
+    池中没有空闲连接时新建连接，归还时池已满则直接关闭
+    数据库文件不存在时抛出 sqlite3.OperationalError
+    """
+    try:
+        conn = _sqlite_pool.get_nowait()
+    except queue.Empty:
+        # mode=rw：数据库文件不存在时直接报错，而不是创建一个空库
+        try:
+            conn = sqlite3.connect(f"file:{quote(SQLITE_PATH)}?mode=rw", uri=True, check_same_thread=False)
+        except sqlite3.OperationalError as e:
+            raise sqlite3.OperationalError(f"{e}: {SQLITE_PATH}") from e
+        conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+
+    try:
+        yield conn
+    except Exception:
+        # 出错的连接不再复用
+        conn.close()
+        raise
+
+    try:
+        _sqlite_pool.put_nowait(conn)
+    except queue.Full:
+        conn.close()
+
+# 数据库查询结果缓存：(kind, id) -> (expire_at, payload)
+# payload 为序列化好的响应体 (body, gzip_body)，与数据一同过期
+# 报告数据很少变化，短时间内重复请求直接从内存返回，避免每次都查询数据库和重新序列化
+_DB_CACHE = {}
+_DB_CACHE_LOCK = threading.Lock()
+_db_cache_stamp = None
+
+
+def _read_db_cache_stamp():
+    """读取缓存失效标记，文件不存在时返回 None"""
+    try:
+        with open(DB_CACHE_INVALIDATE_FILE, 'rb') as f:
+            return f.read(64)
+    except OSError:
+        return None
+
+
+def db_cache_get(key):
+    """
+    从数据库查询结果缓存中获取响应负载，未命中或已过期返回 None
+    失效标记变化（其他 worker 调用过清空接口）时先清空本 worker 的缓存
+    """
+    global _db_cache_stamp
+    if DB_CACHE_TTL <= 0:
+        return None
+    stamp = _read_db_cache_stamp()
+    with _DB_CACHE_LOCK:
+        if stamp != _db_cache_stamp:
+            _DB_CACHE.clear()
+            _db_cache_stamp = stamp
+        entry = _DB_CACHE.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del _DB_CACHE[key]
+            return None
+        return entry[1]
+
+
+def db_cache_set(key, payload):
+    """写入数据库查询结果缓存，超出容量时淘汰最早写入的条目"""
+    if DB_CACHE_TTL <= 0:
+        return
+    with _DB_CACHE_LOCK:
+        if key not in _DB_CACHE and len(_DB_CACHE) >= DB_CACHE_MAXSIZE:
+            del _DB_CACHE[next(iter(_DB_CACHE))]
+        _DB_CACHE[key] = (time.monotonic() + DB_CACHE_TTL, payload)
+
+
+def db_cache_clear():
+    """
+    清空数据库查询结果缓存
+    清空本 worker 的缓存，并更新失效标记，其他 worker 在下一次读缓存时清空各自的缓存
+    """
+    with _DB_CACHE_LOCK:
+        _DB_CACHE.clear()
+    try:
+        # 覆盖写入新的标记值（时间戳 + 进程号），文件大小固定，不随调用次数增长
+        with open(DB_CACHE_INVALIDATE_FILE, 'wb') as f:
+            f.write(b'%d-%d' % (time.time_ns(), os.getpid()))
+    except OSError as e:
+        logger.warning("Failed to update cache invalidation file %s: %s", DB_CACHE_INVALIDATE_FILE, e)
+
 
 # ==================== 上下文数据 ====================
 
@@ -196,18 +491,118 @@ DEFAULT_CONTEXT_DATA = {
 }
 
 
+# 小于该大小的响应体不做预压缩（与 COMPRESS_MIN_SIZE 一致）
+GZIP_MIN_SIZE = 1024
+GZIP_LEVEL = 6
+
+
+def make_json_payload(data):
+    """
+    将数据序列化为可缓存的响应负载
+    响应体达到 GZIP_MIN_SIZE 时同时预压缩一份，随缓存条目一起保存
+
+    Returns:
+        tuple: (body, gzip_body)，响应体过小时 gzip_body 为 None
+    """
+    body = json_dumps_bytes(data)
+    if len(body) < GZIP_MIN_SIZE:
+        return body, None
+    return body, gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def json_payload_response(payload):
+    """
+    返回 JSON 响应
+    客户端支持 gzip 且有预压缩内容时直接返回压缩后的 bytes（Flask-Compress 会跳过已编码的响应）
+    """
+    body, gzip_body = payload
+    if gzip_body is not None and request.accept_encodings['gzip']:
+        response = Response(gzip_body, mimetype='application/json')
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = Response(body, mimetype='application/json')
+    if gzip_body is not None:
+        response.vary.add('Accept-Encoding')
+    return response
+
+
+# JSON 文件缓存：path -> (mtime_ns, size, payload)
+# 文件未变化时直接返回序列化好的响应体，避免每次请求都重新读取、解析和序列化
+_FILE_CACHE = {}
+_FILE_CACHE_LOCK = threading.Lock()
+
+
+def load_json_file_cached(path):
+    """
+    读取 JSON 文件（带缓存）
+    以 (mtime, size) 判断文件是否变化，未变化时直接返回缓存的响应负载
+
+    Args:
+        path: JSON 文件路径
+
+    Returns:
+        tuple: (body, gzip_body)，文件不存在时返回 None
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+
+    # 单次 dict 读取是原子操作，命中路径上无需加锁
+    cached = _FILE_CACHE.get(path)
+    if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+
+    # 以二进制方式读取，由 JSON 解析器直接处理 UTF-8，省去文本模式的解码
+    with open(path, 'rb') as f:
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        data = json_loads(f.read())
+    payload = make_json_payload(data)
+
+    with _FILE_CACHE_LOCK:
+        _FILE_CACHE[path] = (st.st_mtime_ns, st.st_size, payload)
+    return payload
+
+
+def db_payload(cache_key, data):
+    """
+    将数据库查询结果转换为响应负载
+    开启缓存时序列化并预压缩后写入缓存；关闭缓存时只序列化，不做压缩
+    """
+    if DB_CACHE_TTL <= 0:
+        return json_dumps_bytes(data), None
+    payload = make_json_payload(data)
+    db_cache_set(cache_key, payload)
+    return payload
+
+
+# 默认上下文数据是常量，启动时序列化并压缩一次，直接作为响应体返回
+DEFAULT_CONTEXT_PAYLOAD = make_json_payload(DEFAULT_CONTEXT_DATA)
+
+
 def load_context_data():
     """
-    加载上下文数据
+    加载上下文数据（响应负载）
     优先从配置文件加载，如果失败则使用默认数据
     """
-    if os.path.exists(CONTEXT_FILE_PATH):
-        try:
-            with open(CONTEXT_FILE_PATH, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"Warning: Failed to load context file: {e}")
-    return DEFAULT_CONTEXT_DATA
+    try:
+        payload = load_json_file_cached(CONTEXT_FILE_PATH)
+        if payload is not None:
+            return payload
+    except Exception as e:
+        logger.warning("Failed to load context file: %s", e)
+    return DEFAULT_CONTEXT_PAYLOAD
+
+
+# MySQL 查询语句，模块加载时构造一次，所有请求复用同一个语句对象
+if DB_TYPE == 'mysql':
+    MYSQL_CONTEXT_QUERY = text("""
+        SELECT system_prompt, context_data, instructions, project_name
+        FROM report_context
+        WHERE report_id = :report_id AND is_active = 1
+        LIMIT 1
+    """)
 
 
 def load_context_from_mysql(report_id):
@@ -221,25 +616,19 @@ def load_context_from_mysql(report_id):
         dict: 上下文数据，如果未找到返回 None
     """
     if not db_engine:
-        print("MySQL connection not available")
+        logger.warning("MySQL connection not available")
         return None
 
     try:
         with db_engine.connect() as conn:
-            query = text("""
-                SELECT system_prompt, context_data, instructions, project_name
-                FROM report_context
-                WHERE report_id = :report_id AND is_active = 1
-                LIMIT 1
-            """)
-            result = conn.execute(query, {"report_id": report_id}).fetchone()
+            result = conn.execute(MYSQL_CONTEXT_QUERY, {"report_id": report_id}).fetchone()
 
             if result:
                 system_prompt, context_data, instructions, project_name = result
 
                 # context_data 可能是 JSON 字符串或已解析的 dict
                 if isinstance(context_data, str):
-                    context_data = json.loads(context_data)
+                    context_data = json_loads(context_data)
 
                 return {
                     "system": system_prompt or DEFAULT_CONTEXT_DATA["system"],
@@ -250,7 +639,7 @@ def load_context_from_mysql(report_id):
             return None
 
     except Exception as e:
-        print(f"MySQL query error: {e}")
+        logger.error("MySQL query error: %s", e)
         return None
 
 
@@ -264,30 +653,22 @@ def load_context_from_sqlite(report_id):
     Returns:
         dict: 上下文数据，如果未找到返回 None
     """
-    if not os.path.exists(SQLITE_PATH):
-        print(f"SQLite database not found: {SQLITE_PATH}")
-        return None
-
     try:
-        conn = sqlite3.connect(SQLITE_PATH)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT system_prompt, context_data, instructions, project_name
-            FROM report_context
-            WHERE report_id = ? AND is_active = 1
-            LIMIT 1
-        """, (report_id,))
-
-        result = cursor.fetchone()
-        conn.close()
+        with sqlite_connection() as conn:
+            cursor = conn.execute("""
+                SELECT system_prompt, context_data, instructions, project_name
+                FROM report_context
+                WHERE report_id = ? AND is_active = 1
+                LIMIT 1
+            """, (report_id,))
+            result = cursor.fetchone()
 
         if result:
             system_prompt, context_data, instructions, project_name = result
 
             # context_data 是 JSON 字符串
             if isinstance(context_data, str):
-                context_data = json.loads(context_data)
+                context_data = json_loads(context_data)
 
             return {
                 "system": system_prompt or DEFAULT_CONTEXT_DATA["system"],
@@ -298,7 +679,7 @@ def load_context_from_sqlite(report_id):
         return None
 
     except Exception as e:
-        print(f"SQLite query error: {e}")
+        logger.error("SQLite query error: %s", e)
         return None
 
 
@@ -310,10 +691,14 @@ def load_context_by_report_id(report_id):
         report_id: 报告唯一标识
 
     Returns:
-        dict: 上下文数据
+        tuple: 上下文数据的响应负载 (body, gzip_body)
     """
-    context_data = None
+    cache_key = ('context', report_id)
+    payload = db_cache_get(cache_key)
+    if payload is not None:
+        return payload
 
+    context_data = None
     if DB_TYPE == 'mysql':
         context_data = load_context_from_mysql(report_id)
     elif DB_TYPE == 'sqlite':
@@ -321,9 +706,9 @@ def load_context_by_report_id(report_id):
 
     # 如果数据库中未找到，尝试从文件加载
     if context_data is None:
-        context_data = load_context_data()
+        return load_context_data()
 
-    return context_data
+    return db_payload(cache_key, context_data)
 
 
 # ==================== 工具提示词数据 ====================
@@ -335,42 +720,48 @@ DEFAULT_TOOLS_PROMPT = {
     "tools_data": {}
 }
 
+# 默认工具提示词数据是常量，启动时序列化并压缩一次，直接作为响应体返回
+DEFAULT_TOOLS_PROMPT_PAYLOAD = make_json_payload(DEFAULT_TOOLS_PROMPT)
+
 # 工具提示词文件路径
 TOOLS_PROMPT_FILE_PATH = os.environ.get('TOOLS_PROMPT_FILE_PATH', 'tools_prompt.json')
 
 
 def load_tools_prompt_from_file():
-    """从文件加载工具提示词数据"""
-    if os.path.exists(TOOLS_PROMPT_FILE_PATH):
-        try:
-            with open(TOOLS_PROMPT_FILE_PATH, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"Warning: Failed to load tools prompt file: {e}")
-    return DEFAULT_TOOLS_PROMPT
+    """从文件加载工具提示词数据（响应负载）"""
+    try:
+        payload = load_json_file_cached(TOOLS_PROMPT_FILE_PATH)
+        if payload is not None:
+            return payload
+    except Exception as e:
+        logger.warning("Failed to load tools prompt file: %s", e)
+    return DEFAULT_TOOLS_PROMPT_PAYLOAD
+
+
+if DB_TYPE == 'mysql':
+    MYSQL_TOOLS_PROMPT_QUERY = text("""
+        SELECT tools_system_prompt, recommendation_instructions, tools_data
+        FROM tools_prompt
+        WHERE prompt_id = :prompt_id AND is_active = 1
+        LIMIT 1
+    """)
 
 
 def load_tools_prompt_from_mysql(prompt_id='default_tools_prompt'):
     """从 MySQL 数据库加载工具提示词数据"""
     if not db_engine:
-        print("MySQL connection not available")
+        logger.warning("MySQL connection not available")
         return None
 
     try:
         with db_engine.connect() as conn:
-            query = text("""
-                SELECT tools_system_prompt, recommendation_instructions, tools_data
-                FROM tools_prompt
-                WHERE prompt_id = :prompt_id AND is_active = 1
-                LIMIT 1
-            """)
-            result = conn.execute(query, {"prompt_id": prompt_id}).fetchone()
+            result = conn.execute(MYSQL_TOOLS_PROMPT_QUERY, {"prompt_id": prompt_id}).fetchone()
 
             if result:
                 tools_system_prompt, recommendation_instructions, tools_data = result
 
                 if isinstance(tools_data, str):
-                    tools_data = json.loads(tools_data)
+                    tools_data = json_loads(tools_data)
 
                 return {
                     "tools_system_prompt": tools_system_prompt or DEFAULT_TOOLS_PROMPT["tools_system_prompt"],
@@ -381,35 +772,27 @@ def load_tools_prompt_from_mysql(prompt_id='default_tools_prompt'):
             return None
 
     except Exception as e:
-        print(f"MySQL query error for tools_prompt: {e}")
+        logger.error("MySQL query error for tools_prompt: %s", e)
         return None
 
 
 def load_tools_prompt_from_sqlite(prompt_id='default_tools_prompt'):
     """从 SQLite 数据库加载工具提示词数据"""
-    if not os.path.exists(SQLITE_PATH):
-        print(f"SQLite database not found: {SQLITE_PATH}")
-        return None
-
     try:
-        conn = sqlite3.connect(SQLITE_PATH)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT tools_system_prompt, recommendation_instructions, tools_data
-            FROM tools_prompt
-            WHERE prompt_id = ? AND is_active = 1
-            LIMIT 1
-        """, (prompt_id,))
-
-        result = cursor.fetchone()
-        conn.close()
+        with sqlite_connection() as conn:
+            cursor = conn.execute("""
+                SELECT tools_system_prompt, recommendation_instructions, tools_data
+                FROM tools_prompt
+                WHERE prompt_id = ? AND is_active = 1
+                LIMIT 1
+            """, (prompt_id,))
+            result = cursor.fetchone()
 
         if result:
             tools_system_prompt, recommendation_instructions, tools_data = result
 
             if isinstance(tools_data, str):
-                tools_data = json.loads(tools_data)
+                tools_data = json_loads(tools_data)
 
             return {
                 "tools_system_prompt": tools_system_prompt or DEFAULT_TOOLS_PROMPT["tools_system_prompt"],
@@ -420,7 +803,7 @@ def load_tools_prompt_from_sqlite(prompt_id='default_tools_prompt'):
         return None
 
     except Exception as e:
-        print(f"SQLite query error for tools_prompt: {e}")
+        logger.error("SQLite query error for tools_prompt: %s", e)
         return None
 
 
@@ -432,10 +815,14 @@ def load_tools_prompt(prompt_id='default_tools_prompt'):
         prompt_id: 提示词ID，默认为 'default_tools_prompt'
 
     Returns:
-        dict: 工具提示词数据
+        tuple: 工具提示词数据的响应负载 (body, gzip_body)
     """
-    tools_prompt = None
+    cache_key = ('tools_prompt', prompt_id)
+    payload = db_cache_get(cache_key)
+    if payload is not None:
+        return payload
 
+    tools_prompt = None
     if DB_TYPE == 'mysql':
         tools_prompt = load_tools_prompt_from_mysql(prompt_id)
     elif DB_TYPE == 'sqlite':
@@ -443,9 +830,9 @@ def load_tools_prompt(prompt_id='default_tools_prompt'):
 
     # 如果数据库中未找到，尝试从文件加载
     if tools_prompt is None:
-        tools_prompt = load_tools_prompt_from_file()
+        return load_tools_prompt_from_file()
 
-    return tools_prompt
+    return db_payload(cache_key, tools_prompt)
 
 
 def decode_base64_context(base64_str):
@@ -454,9 +841,9 @@ def decode_base64_context(base64_str):
     """
     try:
         decoded = base64.b64decode(base64_str)
-        return json.loads(decoded.decode('utf-8'))
+        return json_loads(decoded)
     except Exception as e:
-        print(f"Error decoding base64 context: {e}")
+        logger.warning("Error decoding base64 context: %s", e)
         return None
 
 
@@ -468,7 +855,26 @@ def verify_access_key(key):
     """
     if not key:
         return False
-    return key.strip() in [k.strip() for k in VALID_ACCESS_KEYS]
+    # 请求头中提取的秘钥已去除空白，先直接查找，未命中时再去除空白后查找
+    return key in VALID_ACCESS_KEYS or key.strip() in VALID_ACCESS_KEYS
+
+
+_BEARER_PREFIX = 'Bearer '
+_BEARER_PREFIX_LEN = len(_BEARER_PREFIX)
+
+
+def extract_access_key(x_access_key, auth_header):
+    """
+    从请求头的原始值中提取访问秘钥
+    优先使用 X-Access-Key，其次使用 Authorization Bearer
+    """
+    if x_access_key:
+        return x_access_key.strip()
+
+    if auth_header and auth_header.startswith(_BEARER_PREFIX):
+        return auth_header[_BEARER_PREFIX_LEN:].strip()
+
+    return None
 
 
 def get_access_key_from_request():
@@ -476,28 +882,27 @@ def get_access_key_from_request():
     从请求中获取访问秘钥
     支持从 X-Access-Key 头部或 Authorization Bearer 头部获取
     """
-    # 优先从 X-Access-Key 头部获取
-    key = request.headers.get('X-Access-Key')
-    if key:
-        return key.strip()
+    headers = request.headers
+    return extract_access_key(headers.get('X-Access-Key'), headers.get('Authorization'))
 
-    # 从 Authorization Bearer 头部获取
-    auth_header = request.headers.get('Authorization', '')
-    if auth_header.startswith('Bearer '):
-        return auth_header[7:].strip()
 
-    return None
+@lru_cache(maxsize=1024)
+def verify_access_key_cached(key):
+    """
+    验证访问秘钥（带缓存）
+    有效秘钥集合在运行期间不变，同一客户端重复使用同一秘钥时直接命中缓存；
+    缓存键是提取后的秘钥本身，不缓存原始的 Authorization 头部
+    """
+    return verify_access_key(key)
 
 
 def require_auth(f):
     """
     装饰器：要求访问秘钥验证
     """
-    from functools import wraps
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        key = get_access_key_from_request()
-        if not verify_access_key(key):
+        if not verify_access_key_cached(get_access_key_from_request()):
             return jsonify({"error": "访问秘钥无效或未提供"}), 401
         return f(*args, **kwargs)
     return decorated_function
@@ -505,6 +910,18 @@ def require_auth(f):
 
 # ==================== API 接口 ====================
 
+def get_json_body():
+    """
+    读取并解析 JSON 请求体
+    请求体超过 MAX_CONTENT_LENGTH（MAX_REQUEST_BODY_BYTES）时 get_data 抛出 RequestEntityTooLarge，由 Flask 返回 413；
+    请求体为空时返回空 dict，JSON 格式错误时抛出 ValueError
+    """
+    body = request.get_data(cache=False)
+    if not body:
+        return {}
+    return json_loads(body)
+
+
 @app.route('/api/verify', methods=['POST'])
 def verify_key():
     """
@@ -514,8 +931,13 @@ def verify_key():
     key = get_access_key_from_request()
 
     # 也可以从请求体获取
-    if not key and request.json:
-        key = request.json.get('key', '')
+    if not key:
+        try:
+            data = get_json_body()
+        except ValueError:
+            data = None
+        if isinstance(data, dict):
+            key = data.get('key', '')
 
     if verify_access_key(key):
         return jsonify({
@@ -559,11 +981,22 @@ def get_context():
 
     # 根据数据源类型加载上下文
     if report_id and DB_TYPE in ('mysql', 'sqlite'):
-        context_data = load_context_by_report_id(report_id)
+        payload = load_context_by_report_id(report_id)
     else:
-        context_data = load_context_data()
+        payload = load_context_data()
 
-    return jsonify(context_data)
+    return json_payload_response(payload)
+
+
+@app.route('/api/context/invalidate', methods=['POST'])
+@require_auth
+def invalidate_context():
+    """
+    清空上下文缓存接口
+    数据库中的报告数据更新后调用：本 worker 立即生效，同一台服务器上的其他 worker 在下一次请求时生效
+    """
+    db_cache_clear()
+    return jsonify({"success": True}), 200
 
 
 @app.route('/api/tools_prompt', methods=['GET'])
@@ -577,8 +1010,53 @@ def get_tools_prompt():
     - prompt_id: 提示词ID，默认为 'default_tools_prompt'
     """
     prompt_id = request.args.get('prompt_id', 'default_tools_prompt')
-    tools_prompt = load_tools_prompt(prompt_id)
-    return jsonify(tools_prompt)
+    return json_payload_response(load_tools_prompt(prompt_id))
+
+
+def parse_chat_request(data):
+    """
+    校验并提取聊天请求参数
+
+    Args:
+        data: 解析后的请求体
+
+    Returns:
+        tuple: (messages, stream, temperature, max_tokens)
+
+    Raises:
+        ValueError: 参数缺失或类型不正确
+    """
+    if not isinstance(data, dict):
+        raise ValueError("请求体必须是 JSON 对象")
+
+    messages = data.get('messages', [])
+    stream = data.get('stream', True)
+    temperature = data.get('temperature', 0.7)
+    max_tokens = data.get('max_tokens', 2000)
+
+    if not isinstance(messages, list):
+        raise ValueError("messages 必须是数组")
+    if not isinstance(stream, bool):
+        raise ValueError("stream 必须是布尔值")
+    if isinstance(temperature, bool) or not isinstance(temperature, (int, float)):
+        raise ValueError("temperature 必须是数字")
+    if isinstance(max_tokens, bool) or not isinstance(max_tokens, int):
+        raise ValueError("max_tokens 必须是整数")
+
+    return messages, stream, temperature, max_tokens
+
+
+def sse_error_frame(message):
+    """
+    构造 SSE 错误帧（bytes）
+    使用 JSON 序列化错误信息，保证上游错误内容中含有引号等字符时仍是合法 JSON
+    """
+    return b'data: ' + json_dumps_bytes({"error": message}) + b'\n\n'
+
+
+# 固定的错误帧，启动时构造一次
+_SSE_TIMEOUT_FRAME = sse_error_frame("请求超时，请稍后重试")
+_SSE_CONNECTION_ERROR_FRAME = sse_error_frame("网络连接失败，请检查网络")
 
 
 @app.route('/api/chat', methods=['POST'])
@@ -604,12 +1082,8 @@ def chat():
 
     # 解析请求
     try:
-        data = request.json
-        messages = data.get('messages', [])
-        stream = data.get('stream', True)
-        temperature = data.get('temperature', 0.7)
-        max_tokens = data.get('max_tokens', 2000)
-    except Exception as e:
+        messages, stream, temperature, max_tokens = parse_chat_request(get_json_body())
+    except ValueError as e:
         return jsonify({"error": f"请求格式错误: {str(e)}"}), 400
 
     if not messages:
@@ -620,40 +1094,44 @@ def chat():
         生成流式响应
         """
         try:
-            response = requests.post(
+            response = deepseek_session.post(
                 DEEPSEEK_API_URL,
-                headers={
-                    'Authorization': f'Bearer {DEEPSEEK_API_KEY}',
-                    'Content-Type': 'application/json'
-                },
-                json={
-                    'model': DEEPSEEK_MODEL,
-                    'messages': messages,
-                    'stream': stream,
-                    'temperature': temperature,
-                    'max_tokens': max_tokens
-                },
+                headers=DEEPSEEK_HEADERS,
+                data=build_chat_request_body(messages, stream, temperature, max_tokens),
                 stream=True,
                 timeout=60
             )
 
-            if response.status_code != 200:
-                error_msg = response.text
-                yield f'data: {{"error": "API请求失败: {error_msg}"}}\n\n'
-                return
-
-            # 转发流式响应
-            for line in response.iter_lines():
-                if line:
-                    decoded_line = line.decode('utf-8')
-                    yield decoded_line + '\n'
+            # 无论正常结束还是客户端中途断开，都关闭上游响应，使连接归还到连接池
+            with response:
+                if response.status_code != 200:
+                    yield sse_error_frame("API请求失败: " + response.text)
+                    return
+
+                # 转发流式响应（直接转发原始 bytes，不逐行解码）。
+                # 上游分块边界可能落在事件中间，而前端按单次读取的数据逐行解析、不保留残行，
+                # 因此只转发到最后一个完整事件（\n\n）为止，剩余部分留到下一块拼接
+                pending = b''
+                for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                    if not chunk:
+                        continue
+                    pending += chunk
+                    end = pending.rfind(b'\n\n')
+                    if end < 0:
+                        continue
+                    end += 2
+                    yield pending[:end]
+                    pending = pending[end:]
+                if pending:
+                    yield pending
 
         except requests.exceptions.Timeout:
-            yield 'data: {"error": "请求超时，请稍后重试"}\n\n'
+            yield _SSE_TIMEOUT_FRAME
         except requests.exceptions.ConnectionError:
-            yield 'data: {"error": "网络连接失败，请检查网络"}\n\n'
+            yield _SSE_CONNECTION_ERROR_FRAME
         except Exception as e:
-            yield f'data: {{"error": "服务器错误: {str(e)}"}}\n\n'
+            logger.exception("Chat stream failed")
+            yield sse_error_frame("服务器错误: " + str(e))
 
     return Response(
         generate_stream(),
@@ -677,37 +1155,25 @@ def chat_sync():
         return jsonify({"error": "API Key 未配置，请联系管理员"}), 500
 
     try:
-        data = request.json
-        messages = data.get('messages', [])
-        temperature = data.get('temperature', 0.7)
-        max_tokens = data.get('max_tokens', 2000)
-    except Exception as e:
+        messages, _, temperature, max_tokens = parse_chat_request(get_json_body())
+    except ValueError as e:
         return jsonify({"error": f"请求格式错误: {str(e)}"}), 400
 
     if not messages:
         return jsonify({"error": "messages 不能为空"}), 400
 
     try:
-        response = requests.post(
+        response = deepseek_session.post(
             DEEPSEEK_API_URL,
-            headers={
-                'Authorization': f'Bearer {DEEPSEEK_API_KEY}',
-                'Content-Type': 'application/json'
-            },
-            json={
-                'model': DEEPSEEK_MODEL,
-                'messages': messages,
-                'stream': False,
-                'temperature': temperature,
-                'max_tokens': max_tokens
-            },
+            headers=DEEPSEEK_HEADERS,
+            data=build_chat_request_body(messages, False, temperature, max_tokens),
             timeout=60
         )
 
         if response.status_code != 200:
             return jsonify({"error": f"API请求失败: {response.text}"}), response.status_code
 
-        result = response.json()
+        result = json_loads(response.content)
         content = result.get('choices', [{}])[0].get('message', {}).get('content', '')
 
         return jsonify({
@@ -720,6 +1186,7 @@ def chat_sync():
     except requests.exceptions.ConnectionError:
         return jsonify({"error": "网络连接失败"}), 502
     except Exception as e:
+        logger.exception("Chat sync failed")
         return jsonify({"error": f"服务器错误: {str(e)}"}), 500
 
 
@@ -730,6 +1197,11 @@ def not_found(e):
     return jsonify({"error": "接口不存在"}), 404
 
 
+@app.errorhandler(413)
+def request_too_large(e):
+    return jsonify({"error": "请求内容过大"}), 413
+
+
 @app.errorhandler(500)
 def server_error(e):
     return jsonify({"error": "服务器内部错误"}), 500
@@ -740,15 +1212,17 @@ def server_error(e):
 if __name__ == '__main__':
     # 检查 API Key 配置
     if not DEEPSEEK_API_KEY:
-        print("Warning: DEEPSEEK_API_KEY 未配置!")
-        print("请设置环境变量: export DEEPSEEK_API_KEY='your-api-key'")
-        print("")
-
-    print(f"Starting AI Assistant Backend Server...")
-    print(f"Server: http://{SERVER_HOST}:{SERVER_PORT}")
-    print(f"Health Check: http://{SERVER_HOST}:{SERVER_PORT}/api/health")
-    print(f"Debug Mode: {DEBUG_MODE}")
-    print("")
+        logger.warning("DEEPSEEK_API_KEY 未配置! 请设置环境变量: export DEEPSEEK_API_KEY='your-api-key'")
+
+    # 启动信息一次性写出
+    sys.stdout.write(
+        "Starting AI Assistant Backend Server...\n"
+        f"Server: http://{SERVER_HOST}:{SERVER_PORT}\n"
+        f"Health Check: http://{SERVER_HOST}:{SERVER_PORT}/api/health\n"
+        f"Debug Mode: {DEBUG_MODE}\n"
+        "\n"
+    )
+    sys.stdout.flush()
 
     app.run(
         host=SERVER_HOST,
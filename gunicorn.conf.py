@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+gunicorn 配置文件（生产环境）
+
+/api/chat 与 /api/chat/sync 基本都在等待 DeepSeek 返回，属于 I/O 密集型，
+使用 gevent 协程 worker，每个 worker 可以同时处理大量流式对话。
+gevent worker 启动时会自动对 socket 等标准库打 monkey patch，无需在代码中处理。
+
+启动方式：
+    gunicorn -c gunicorn.conf.py backend_server:app
+"""
+
+import os
+
+bind = f"{os.environ.get('SERVER_HOST', '0.0.0.0')}:{os.environ.get('SERVER_PORT', 8100)}"
+
+# worker 配置
+worker_class = 'gevent'
+workers = int(os.environ.get('GUNICORN_WORKERS', (os.cpu_count() or 2) * 2 + 1))
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+
+# worker 心跳超时：worker 超过该时间未向主进程报告存活即被重启。
+# gevent worker 中单个请求的耗时不受此限制（请求时长由 DeepSeek 请求超时与 Nginx proxy_read_timeout 控制）
+timeout = 120
+
+# worker 退出（定期重启、reload、停止服务）时，等待进行中的流式对话结束的最长时间，
+# 超时后强制结束。流式对话可能超过 DeepSeek 的 60 秒读超时，因此不小于 timeout
+graceful_timeout = 120
+
+# 长连接保持时间，需大于 Nginx upstream 的 keepalive_timeout（见 deploy/nginx.conf）
+keepalive = 30
+
+# 定期重启 worker，防止内存缓慢增长；重启时按 graceful_timeout 等待进行中的请求结束
+max_requests = 500
+max_requests_jitter = 200
+
+
+def post_fork(server, worker):
+    """
+    worker 进程启动后、加载应用前执行：把实际生效的 worker 数（包括命令行 -w 覆盖的值）写入环境变量，
+    backend_server 据此把 MySQL 连接总数（DB_MAX_CONNECTIONS）平均分配到各 worker 的连接池
+    """
+    os.environ['GUNICORN_WORKERS'] = str(server.cfg.workers)
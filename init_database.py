@@ -25,9 +25,24 @@ import os
 import json
 import sys
 
+# JSON 加速（可选，未安装 orjson 时回退到标准库 json）
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 DB_TYPE = os.environ.get('DB_TYPE', 'sqlite')
 
+
+def dumps_json(obj):
+    """序列化为 JSON 字符串（保留中文），优先使用 orjson"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode('utf-8')
+    return json.dumps(obj, ensure_ascii=False)
+
+
 # MySQL 表创建语句 - 报告上下文表
+# report_id / prompt_id 的 UNIQUE 约束本身就是索引，不再单独建普通索引，避免每次写入都多维护一棵 B-tree
 MYSQL_CREATE_REPORT_TABLE = """
 CREATE TABLE IF NOT EXISTS report_context (
     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -39,7 +54,6 @@ CREATE TABLE IF NOT EXISTS report_context (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     is_active TINYINT(1) DEFAULT 1 COMMENT '是否启用',
-    INDEX idx_report_id (report_id),
     INDEX idx_is_active (is_active)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 """
@@ -55,11 +69,36 @@ CREATE TABLE IF NOT EXISTS tools_prompt (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     is_active TINYINT(1) DEFAULT 1 COMMENT '是否启用',
-    INDEX idx_prompt_id (prompt_id),
     INDEX idx_is_active (is_active)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 """
 
+# MySQL 示例数据插入语句
+# 保持 "VALUES (%s, ...)" 的写法：pymysql / mysqlclient 的 executemany 识别到该形式时，
+# 会把多行数据合并成一条多值 INSERT 发送，而不是逐行执行
+MYSQL_INSERT_REPORT_SQL = """
+INSERT INTO report_context (report_id, project_name, system_prompt, context_data, instructions)
+VALUES (%s, %s, %s, %s, %s)
+ON DUPLICATE KEY UPDATE
+    project_name = VALUES(project_name),
+    system_prompt = VALUES(system_prompt),
+    context_data = VALUES(context_data),
+    instructions = VALUES(instructions),
+    is_active = 1,
+    updated_at = CURRENT_TIMESTAMP
+"""
+
+MYSQL_INSERT_TOOLS_SQL = """
+INSERT INTO tools_prompt (prompt_id, tools_system_prompt, recommendation_instructions, tools_data)
+VALUES (%s, %s, %s, %s)
+ON DUPLICATE KEY UPDATE
+    tools_system_prompt = VALUES(tools_system_prompt),
+    recommendation_instructions = VALUES(recommendation_instructions),
+    tools_data = VALUES(tools_data),
+    is_active = 1,
+    updated_at = CURRENT_TIMESTAMP
+"""
+
 # SQLite 表创建语句 - 报告上下文表
 SQLITE_CREATE_REPORT_TABLE = """
 CREATE TABLE IF NOT EXISTS report_context (
@@ -74,7 +113,6 @@ CREATE TABLE IF NOT EXISTS report_context (
     is_active INTEGER DEFAULT 1
 );
 
-CREATE INDEX IF NOT EXISTS idx_report_id ON report_context(report_id);
 CREATE INDEX IF NOT EXISTS idx_is_active ON report_context(is_active);
 """
 
@@ -91,7 +129,6 @@ CREATE TABLE IF NOT EXISTS tools_prompt (
     is_active INTEGER DEFAULT 1
 );
 
-CREATE INDEX IF NOT EXISTS idx_tools_prompt_id ON tools_prompt(prompt_id);
 CREATE INDEX IF NOT EXISTS idx_tools_is_active ON tools_prompt(is_active);
 """
 
@@ -221,10 +258,73 @@ TOOLS_PROMPT_DATA = {
     }
 }
 
+# 示例数据中的 JSON 字段在模块加载时序列化一次，MySQL / SQLite 初始化共用
+SAMPLE_CONTEXT_JSON = dumps_json(SAMPLE_DATA["context_data"])
+TOOLS_DATA_JSON = dumps_json(TOOLS_PROMPT_DATA["tools_data"])
+
+# 示例数据与数据库中已有数据比较时使用的值（顺序与下面的 SELECT 列一致，JSON 列为解析后的对象）
+# 包含 is_active = 1：已停用的示例数据不视为一致，重新初始化时会被重新写入并启用
+# （MySQL 的 ON DUPLICATE KEY UPDATE 与 SQLite 的 INSERT OR REPLACE 都会把 is_active 置为 1）
+REPORT_SEED_VALUES = (
+    SAMPLE_DATA["project_name"],
+    SAMPLE_DATA["system_prompt"],
+    SAMPLE_DATA["context_data"],
+    SAMPLE_DATA["instructions"],
+    1
+)
+TOOLS_SEED_VALUES = (
+    TOOLS_PROMPT_DATA["tools_system_prompt"],
+    TOOLS_PROMPT_DATA["recommendation_instructions"],
+    TOOLS_PROMPT_DATA["tools_data"],
+    1
+)
+
+SELECT_REPORT_SEED_SQL = """
+SELECT project_name, system_prompt, context_data, instructions, is_active
+FROM report_context WHERE report_id = {placeholder}
+"""
+
+SELECT_TOOLS_SEED_SQL = """
+SELECT tools_system_prompt, recommendation_instructions, tools_data, is_active
+FROM tools_prompt WHERE prompt_id = {placeholder}
+"""
+
+
+def seed_unchanged(cursor, select_sql, key, expected):
+    """
+    判断数据库中已有的示例数据是否与当前示例数据一致
+    JSON 列解析后再比较，不受数据库存储格式（如 MySQL JSON 列的空格）影响
+
+    Args:
+        cursor: 数据库游标
+        select_sql: 查询已有数据的语句
+        key: report_id / prompt_id
+        expected: 期望的列值
+
+    Returns:
+        bool: 一致时返回 True，数据不存在或有差异时返回 False
+    """
+    cursor.execute(select_sql, (key,))
+    row = cursor.fetchone()
+    if row is None:
+        return False
+    try:
+        stored = tuple(
+            json.loads(value) if isinstance(want, (dict, list)) else value
+            for value, want in zip(row, expected)
+        )
+    except (TypeError, ValueError):
+        return False
+    return stored == expected
+
 
 def init_mysql():
     """初始化 MySQL 数据库"""
-    import pymysql
+    # 优先使用 mysqlclient（C 扩展，参数绑定和收发更快），未安装时回退到 pymysql；两者均为 DB-API 接口
+    try:
+        import MySQLdb as mysql_driver
+    except ImportError:
+        import pymysql as mysql_driver
 
     host = os.environ.get('MYSQL_HOST', 'localhost')
     port = int(os.environ.get('MYSQL_PORT', 3306))
@@ -232,16 +332,17 @@ def init_mysql():
     password = os.environ.get('MYSQL_PASSWORD', '')
     database = os.environ.get('MYSQL_DATABASE', 'ai_assistant')
 
-    print(f"Connecting to MySQL: {host}:{port}/{database}")
+    print(f"Connecting to MySQL: {host}:{port}/{database} (driver: {mysql_driver.__name__})")
 
     try:
         # 先连接到MySQL服务器（不指定数据库）
-        conn = pymysql.connect(
+        conn = mysql_driver.connect(
             host=host,
             port=port,
             user=user,
             password=password,
-            charset='utf8mb4'
+            charset='utf8mb4',
+            autocommit=False
         )
         cursor = conn.cursor()
 
@@ -252,55 +353,45 @@ def init_mysql():
         # 切换到数据库
         cursor.execute(f"USE {database}")
 
-        # 创建报告上下文表
+        # 创建报告上下文表（MySQL 的 DDL 会隐式提交，无需单独 commit）
         cursor.execute(MYSQL_CREATE_REPORT_TABLE)
-        conn.commit()
         print("Table 'report_context' created or already exists")
 
         # 创建工具提示词表
         cursor.execute(MYSQL_CREATE_TOOLS_TABLE)
-        conn.commit()
         print("Table 'tools_prompt' created or already exists")
 
-        # 插入报告上下文示例数据
-        insert_report_sql = """
-            INSERT INTO report_context (report_id, project_name, system_prompt, context_data, instructions)
-            VALUES (%s, %s, %s, %s, %s)
-            ON DUPLICATE KEY UPDATE
-                project_name = VALUES(project_name),
-                system_prompt = VALUES(system_prompt),
-                context_data = VALUES(context_data),
-                instructions = VALUES(instructions),
-                updated_at = CURRENT_TIMESTAMP
-        """
-        cursor.execute(insert_report_sql, (
-            SAMPLE_DATA["report_id"],
-            SAMPLE_DATA["project_name"],
-            SAMPLE_DATA["system_prompt"],
-            json.dumps(SAMPLE_DATA["context_data"], ensure_ascii=False),
-            SAMPLE_DATA["instructions"]
-        ))
-        conn.commit()
-        print(f"Report context inserted: report_id = {SAMPLE_DATA['report_id']}")
+        # 插入报告上下文示例数据（示例数据在同一事务中批量写入，最后统一提交）
+        # 已有数据与示例数据一致时跳过写入，重复执行初始化不会产生写入
+        if seed_unchanged(cursor, SELECT_REPORT_SEED_SQL.format(placeholder='%s'),
+                          SAMPLE_DATA["report_id"], REPORT_SEED_VALUES):
+            print(f"Report context unchanged, skipping: report_id = {SAMPLE_DATA['report_id']}")
+        else:
+            report_rows = [(
+                SAMPLE_DATA["report_id"],
+                SAMPLE_DATA["project_name"],
+                SAMPLE_DATA["system_prompt"],
+                SAMPLE_CONTEXT_JSON,
+                SAMPLE_DATA["instructions"]
+            )]
+            cursor.executemany(MYSQL_INSERT_REPORT_SQL, report_rows)
+            print(f"Report context inserted: report_id = {SAMPLE_DATA['report_id']}")
 
         # 插入工具提示词数据
-        insert_tools_sql = """
-            INSERT INTO tools_prompt (prompt_id, tools_system_prompt, recommendation_instructions, tools_data)
-            VALUES (%s, %s, %s, %s)
-            ON DUPLICATE KEY UPDATE
-                tools_system_prompt = VALUES(tools_system_prompt),
-                recommendation_instructions = VALUES(recommendation_instructions),
-                tools_data = VALUES(tools_data),
-                updated_at = CURRENT_TIMESTAMP
-        """
-        cursor.execute(insert_tools_sql, (
-            TOOLS_PROMPT_DATA["prompt_id"],
-            TOOLS_PROMPT_DATA["tools_system_prompt"],
-            TOOLS_PROMPT_DATA["recommendation_instructions"],
-            json.dumps(TOOLS_PROMPT_DATA["tools_data"], ensure_ascii=False)
-        ))
+        if seed_unchanged(cursor, SELECT_TOOLS_SEED_SQL.format(placeholder='%s'),
+                          TOOLS_PROMPT_DATA["prompt_id"], TOOLS_SEED_VALUES):
+            print(f"Tools prompt unchanged, skipping: prompt_id = {TOOLS_PROMPT_DATA['prompt_id']}")
+        else:
+            tools_rows = [(
+                TOOLS_PROMPT_DATA["prompt_id"],
+                TOOLS_PROMPT_DATA["tools_system_prompt"],
+                TOOLS_PROMPT_DATA["recommendation_instructions"],
+                TOOLS_DATA_JSON
+            )]
+            cursor.executemany(MYSQL_INSERT_TOOLS_SQL, tools_rows)
+            print(f"Tools prompt inserted: prompt_id = {TOOLS_PROMPT_DATA['prompt_id']}")
+
         conn.commit()
-        print(f"Tools prompt inserted: prompt_id = {TOOLS_PROMPT_DATA['prompt_id']}")
 
         cursor.close()
         conn.close()
@@ -320,53 +411,64 @@ def init_sqlite():
     print(f"Creating SQLite database: {db_path}")
 
     try:
-        conn = sqlite3.connect(db_path)
+        # isolation_level=None：不使用 sqlite3 模块的隐式事务，事务边界完全由下面的 BEGIN / COMMIT 控制
+        conn = sqlite3.connect(db_path, isolation_level=None)
         cursor = conn.cursor()
 
-        # 创建报告上下文表
-        for statement in SQLITE_CREATE_REPORT_TABLE.split(';'):
-            statement = statement.strip()
-            if statement:
-                cursor.execute(statement)
-        conn.commit()
+        # page_size 只对新建的数据库生效，需在切换到 WAL 之前设置
+        cursor.execute("PRAGMA page_size=8192")
+        # WAL 模式 + NORMAL 同步级别：减少写入时的 fsync 次数，并允许后台服务读取与写入并发进行
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA cache_size=-20000")
+        cursor.execute("PRAGMA mmap_size=268435456")
+
+        # 建表与插入数据放在同一个显式事务中，最后统一提交，整个初始化只需一次 fsync
+        # （executescript 会先提交已有事务，因此 BEGIN 放在脚本开头，由脚本开启事务）
+        cursor.executescript("BEGIN IMMEDIATE;" + SQLITE_CREATE_REPORT_TABLE + SQLITE_CREATE_TOOLS_TABLE)
         print("Table 'report_context' created or already exists")
-
-        # 创建工具提示词表
-        for statement in SQLITE_CREATE_TOOLS_TABLE.split(';'):
-            statement = statement.strip()
-            if statement:
-                cursor.execute(statement)
-        conn.commit()
         print("Table 'tools_prompt' created or already exists")
 
         # 插入报告上下文示例数据
-        cursor.execute("""
-            INSERT OR REPLACE INTO report_context
-            (report_id, project_name, system_prompt, context_data, instructions)
-            VALUES (?, ?, ?, ?, ?)
-        """, (
-            SAMPLE_DATA["report_id"],
-            SAMPLE_DATA["project_name"],
-            SAMPLE_DATA["system_prompt"],
-            json.dumps(SAMPLE_DATA["context_data"], ensure_ascii=False),
-            SAMPLE_DATA["instructions"]
-        ))
-        conn.commit()
-        print(f"Report context inserted: report_id = {SAMPLE_DATA['report_id']}")
+        # 已有数据与示例数据一致时跳过写入，重复执行初始化不会产生写入
+        if seed_unchanged(cursor, SELECT_REPORT_SEED_SQL.format(placeholder='?'),
+                          SAMPLE_DATA["report_id"], REPORT_SEED_VALUES):
+            print(f"Report context unchanged, skipping: report_id = {SAMPLE_DATA['report_id']}")
+        else:
+            report_rows = [(
+                SAMPLE_DATA["report_id"],
+                SAMPLE_DATA["project_name"],
+                SAMPLE_DATA["system_prompt"],
+                SAMPLE_CONTEXT_JSON,
+                SAMPLE_DATA["instructions"]
+            )]
+            cursor.executemany("""
+                INSERT OR REPLACE INTO report_context
+                (report_id, project_name, system_prompt, context_data, instructions)
+                VALUES (?, ?, ?, ?, ?)
+            """, report_rows)
+            print(f"Report context inserted: report_id = {SAMPLE_DATA['report_id']}")
 
         # 插入工具提示词数据
-        cursor.execute("""
-            INSERT OR REPLACE INTO tools_prompt
-            (prompt_id, tools_system_prompt, recommendation_instructions, tools_data)
-            VALUES (?, ?, ?, ?)
-        """, (
-            TOOLS_PROMPT_DATA["prompt_id"],
-            TOOLS_PROMPT_DATA["tools_system_prompt"],
-            TOOLS_PROMPT_DATA["recommendation_instructions"],
-            json.dumps(TOOLS_PROMPT_DATA["tools_data"], ensure_ascii=False)
-        ))
-        conn.commit()
-        print(f"Tools prompt inserted: prompt_id = {TOOLS_PROMPT_DATA['prompt_id']}")
+        if seed_unchanged(cursor, SELECT_TOOLS_SEED_SQL.format(placeholder='?'),
+                          TOOLS_PROMPT_DATA["prompt_id"], TOOLS_SEED_VALUES):
+            print(f"Tools prompt unchanged, skipping: prompt_id = {TOOLS_PROMPT_DATA['prompt_id']}")
+        else:
+            tools_rows = [(
+                TOOLS_PROMPT_DATA["prompt_id"],
+                TOOLS_PROMPT_DATA["tools_system_prompt"],
+                TOOLS_PROMPT_DATA["recommendation_instructions"],
+                TOOLS_DATA_JSON
+            )]
+            cursor.executemany("""
+                INSERT OR REPLACE INTO tools_prompt
+                (prompt_id, tools_system_prompt, recommendation_instructions, tools_data)
+                VALUES (?, ?, ?, ?)
+            """, tools_rows)
+            print(f"Tools prompt inserted: prompt_id = {TOOLS_PROMPT_DATA['prompt_id']}")
+
+        cursor.execute("COMMIT")
 
         cursor.close()
         conn.close()
@@ -6,9 +6,17 @@ AI助手后台服务测试脚本
 测试所有 API 接口是否正常工作
 """
 
-import requests
+import io
 import json
+import re
+import socket
 import sys
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
 
 # 后台服务地址
 BASE_URL = "http://localhost:8100/api"
@@ -16,6 +24,14 @@ BASE_URL = "http://localhost:8100/api"
 # 测试用的访问秘钥（需要与后台配置的 VALID_ACCESS_KEYS 一致）
 TEST_ACCESS_KEY = "demo-key-123"
 
+# 从 SSE 数据行中直接提取 "content" 字段的字符串字面量，避免逐个解析整个 JSON
+_CONTENT_RE = re.compile(rb'"content":\s*"((?:[^"\\]|\\.)*)"')
+
+# 所有测试共用一个 Session，复用 HTTP 长连接
+SESSION = requests.Session()
+SESSION.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=8))
+SESSION.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
 
 def get_auth_headers():
     """获取带认证的请求头"""
@@ -25,108 +41,127 @@ def get_auth_headers():
         "Authorization": f"Bearer {TEST_ACCESS_KEY}"
     }
 
-def test_health():
+def port_reachable(url, timeout=0.5):
+    """探测服务端口是否可以建立 TCP 连接，服务未启动时快速失败"""
+    parts = urlsplit(url)
+    port = parts.port or (443 if parts.scheme == 'https' else 80)
+    try:
+        socket.create_connection((parts.hostname, port), timeout=timeout).close()
+        return True
+    except OSError:
+        return False
+
+
+def test_health(out=None):
     """测试健康检查接口"""
-    print("=" * 50)
-    print("1. 测试健康检查接口 GET /api/health")
-    print("=" * 50)
+    log = partial(print, file=out or sys.stdout)
+    log("=" * 50)
+    log("1. 测试健康检查接口 GET /api/health")
+    log("=" * 50)
+
+    if not port_reachable(BASE_URL):
+        log("❌ 连接失败，请确认服务已启动")
+        return False
 
     try:
-        response = requests.get(f"{BASE_URL}/health", timeout=5)
-        print(f"状态码: {response.status_code}")
-        print(f"响应: {json.dumps(response.json(), indent=2, ensure_ascii=False)}")
+        response = SESSION.get(f"{BASE_URL}/health", timeout=5)
+        log(f"状态码: {response.status_code}")
+        log(f"响应: {response.text}")
 
         if response.status_code == 200:
-            print("✅ 健康检查通过")
+            log("✅ 健康检查通过")
             return True
         else:
-            print("❌ 健康检查失败")
+            log("❌ 健康检查失败")
             return False
     except requests.exceptions.ConnectionError:
-        print("❌ 连接失败，请确认服务已启动")
+        log("❌ 连接失败，请确认服务已启动")
         return False
     except Exception as e:
-        print(f"❌ 错误: {e}")
+        log(f"❌ 错误: {e}")
         return False
 
 
-def test_verify_key():
+def test_verify_key(out=None):
     """测试秘钥验证接口"""
-    print("\n" + "=" * 50)
-    print("2. 测试秘钥验证接口 POST /api/verify")
-    print("=" * 50)
+    log = partial(print, file=out or sys.stdout)
+    log("\n" + "=" * 50)
+    log("2. 测试秘钥验证接口 POST /api/verify")
+    log("=" * 50)
 
     try:
         # 测试有效秘钥
-        print("测试有效秘钥...")
-        response = requests.post(
+        log("测试有效秘钥...")
+        response = SESSION.post(
             f"{BASE_URL}/verify",
             headers=get_auth_headers(),
             json={"key": TEST_ACCESS_KEY},
             timeout=5
         )
-        print(f"状态码: {response.status_code}")
+        log(f"状态码: {response.status_code}")
 
         if response.status_code == 200:
             data = response.json()
-            print(f"验证结果: {data.get('message', '')}")
-            print("✅ 有效秘钥验证通过")
+            log(f"验证结果: {data.get('message', '')}")
+            log("✅ 有效秘钥验证通过")
         else:
-            print(f"❌ 有效秘钥验证失败: {response.text}")
+            log(f"❌ 有效秘钥验证失败: {response.text}")
             return False
 
         # 测试无效秘钥
-        print("\n测试无效秘钥...")
-        response = requests.post(
+        log("\n测试无效秘钥...")
+        response = SESSION.post(
             f"{BASE_URL}/verify",
             headers={"Content-Type": "application/json", "X-Access-Key": "invalid-key"},
             json={"key": "invalid-key"},
             timeout=5
         )
-        print(f"状态码: {response.status_code}")
+        log(f"状态码: {response.status_code}")
 
         if response.status_code == 401:
-            print("✅ 无效秘钥正确返回401")
+            log("✅ 无效秘钥正确返回401")
             return True
         else:
-            print(f"❌ 无效秘钥应返回401，实际: {response.status_code}")
+            log(f"❌ 无效秘钥应返回401，实际: {response.status_code}")
             return False
 
     except Exception as e:
-        print(f"❌ 错误: {e}")
+        log(f"❌ 错误: {e}")
         return False
 
 
-def test_context():
+def test_context(out=None):
     """测试获取上下文接口"""
-    print("\n" + "=" * 50)
-    print("3. 测试获取上下文接口 GET /api/context")
-    print("=" * 50)
+    log = partial(print, file=out or sys.stdout)
+    log("\n" + "=" * 50)
+    log("3. 测试获取上下文接口 GET /api/context")
+    log("=" * 50)
 
     try:
-        response = requests.get(f"{BASE_URL}/context", headers=get_auth_headers(), timeout=5)
-        print(f"状态码: {response.status_code}")
+        response = SESSION.get(f"{BASE_URL}/context", headers=get_auth_headers(), timeout=5)
+        log(f"状态码: {response.status_code}")
 
         if response.status_code == 200:
             data = response.json()
-            print(f"system: {data.get('system', '')[:50]}...")
-            print(f"context keys: {list(data.get('context', {}).keys())}")
-            print(f"instructions: {data.get('instructions', '')[:50]}...")
-            print("✅ 获取上下文成功")
+            log(f"system: {data.get('system', '')[:50]}...")
+            log(f"context keys: {list(data.get('context', {}).keys())}")
+            log(f"instructions: {data.get('instructions', '')[:50]}...")
+            log("✅ 获取上下文成功")
             return True
         else:
-            print(f"❌ 获取上下文失败: {response.text}")
+            log(f"❌ 获取上下文失败: {response.text}")
             return False
     except Exception as e:
-        print(f"❌ 错误: {e}")
+        log(f"❌ 错误: {e}")
         return False
 
 
-def test_chat_sync():
+def test_chat_sync(out=None):
     """测试同步聊天接口"""
-    print("\n" + "=" * 50)
-    print("4. 测试同步聊天接口 POST /api/chat/sync")
-    print("=" * 50)
+    log = partial(print, file=out or sys.stdout)
+    log("\n" + "=" * 50)
+    log("4. 测试同步聊天接口 POST /api/chat/sync")
+    log("=" * 50)
 
     try:
         messages = [
@@ -134,33 +169,92 @@ def test_chat_sync():
             {"role": "user", "content": "你好，请用一句话介绍自己"}
         ]
 
-        response = requests.post(
+        response = SESSION.post(
             f"{BASE_URL}/chat/sync",
             headers=get_auth_headers(),
             json={"messages": messages},
             timeout=30
         )
 
-        print(f"状态码: {response.status_code}")
+        log(f"状态码: {response.status_code}")
 
         if response.status_code == 200:
             data = response.json()
-            print(f"AI回复: {data.get('content', '')}")
-            print("✅ 同步聊天测试成功")
+            log(f"AI回复: {data.get('content', '')}")
+            log("✅ 同步聊天测试成功")
             return True
         else:
-            print(f"❌ 同步聊天失败: {response.text}")
+            log(f"❌ 同步聊天失败: {response.text[:200]}")
             return False
     except Exception as e:
-        print(f"❌ 错误: {e}")
+        log(f"❌ 错误: {e}")
         return False
 
 
-def test_chat_stream():
+def iter_sse_data(response, chunk_size=65536):
+    """
+    逐行扫描流式响应，逐个返回 "data: " 之后的内容
+
+    直接从底层连接读取已到达的数据（read1），在同一个缓冲区中按换行查找，
+    只为匹配到的数据行复制一次 bytes；请求需带 Accept-Encoding: identity，底层数据未经压缩
+    """
+    raw = response.raw
+    if hasattr(raw, 'read1'):
+        chunks = iter(lambda: raw.read1(chunk_size), b'')
+    else:
+        # 旧版 urllib3 没有 read1
+        chunks = response.iter_content(chunk_size=chunk_size)
+
+    buffer = bytearray()
+    for chunk in chunks:
+        buffer += chunk
+        start = 0
+        with memoryview(buffer) as view:
+            while True:
+                end = buffer.find(b'\n', start)
+                if end == -1:
+                    break
+                if buffer.startswith(b'data: ', start, end):
+                    yield bytes(view[start + 6:end])
+                start = end + 1
+        del buffer[:start]
+
+    # 最后一行之后可能没有换行
+    if buffer.startswith(b'data: '):
+        yield bytes(buffer[6:])
+
+
+def extract_delta_content(data):
+    """
+    提取 SSE 数据中增量回复的文本内容
+
+    Args:
+        data: "data: " 之后的原始 bytes
+
+    Returns:
+        str: 回复内容，没有内容时返回空字符串
+    """
+    if data == b'[DONE]':
+        return ''
+
+    match = _CONTENT_RE.search(data)
+    if match:
+        # 只对字符串字面量做一次 JSON 解码，处理 \uXXXX 等转义
+        return json.loads(b'"' + match.group(1) + b'"')
+
+    # 未匹配到时（如 content 为 null）回退到完整解析
+    try:
+        return json.loads(data).get('choices', [{}])[0].get('delta', {}).get('content') or ''
+    except (ValueError, AttributeError, IndexError):
+        return ''
+
+
+def test_chat_stream(out=None):
     """测试流式聊天接口"""
-    print("\n" + "=" * 50)
-    print("5. 测试流式聊天接口 POST /api/chat")
-    print("=" * 50)
+    log = partial(print, file=out or sys.stdout)
+    log("\n" + "=" * 50)
+    log("5. 测试流式聊天接口 POST /api/chat")
+    log("=" * 50)
 
     try:
         messages = [
@@ -168,65 +262,68 @@ def test_chat_stream():
             {"role": "user", "content": "你好"}
         ]
 
-        response = requests.post(
+        response = SESSION.post(
             f"{BASE_URL}/chat",
-            headers=get_auth_headers(),
+            headers={**get_auth_headers(), "Accept-Encoding": "identity"},
             json={"messages": messages, "stream": True},
             stream=True,
             timeout=30
         )
 
-        print(f"状态码: {response.status_code}")
+        log(f"状态码: {response.status_code}")
 
         if response.status_code == 200:
-            print("流式响应内容:")
+            log("流式响应内容:")
             full_content = ""
-            for line in response.iter_lines():
-                if line:
-                    decoded = line.decode('utf-8')
-                    if decoded.startswith('data: '):
-                        data_str = decoded[6:]
-                        if data_str != '[DONE]':
-                            try:
-                                data = json.loads(data_str)
-                                content = data.get('choices', [{}])[0].get('delta', {}).get('content', '')
-                                if content:
-                                    full_content += content
-                                    print(content, end='', flush=True)
-                            except:
-                                pass
-            print()
-            print("✅ 流式聊天测试成功")
+            for data in iter_sse_data(response):
+                content = extract_delta_content(data)
+                if content:
+                    full_content += content
+                    log(content, end='', flush=True)
+            log()
+            log("✅ 流式聊天测试成功")
             return True
         else:
-            print(f"❌ 流式聊天失败: {response.text}")
+            log(f"❌ 流式聊天失败: {response.text}")
             return False
     except Exception as e:
-        print(f"❌ 错误: {e}")
+        log(f"❌ 错误: {e}")
         return False
 
 
+def run_buffered(test):
+    """运行单个测试，输出写入该测试自己的缓冲区，返回 (是否通过, 测试输出)"""
+    buffer = io.StringIO()
+    passed = test(buffer)
+    return passed, buffer.getvalue()
+
+
 def main():
     """运行所有测试"""
     print("\n🚀 AI助手后台服务测试")
     print(f"测试地址: {BASE_URL}\n")
 
-    results = []
-
-    # 测试健康检查
-    results.append(("健康检查", test_health()))
-
-    # 测试秘钥验证
-    results.append(("秘钥验证", test_verify_key()))
+    buffered_tests = [
+        ("健康检查", test_health),
+        ("秘钥验证", test_verify_key),
+        ("获取上下文", test_context),
+        ("同步聊天", test_chat_sync),
+    ]
+
+    # 各测试互不依赖，并发运行，总耗时约等于最慢的一个（流式聊天）。
+    # 流式聊天在主线程运行，回复内容到达即打印；其余测试在线程池中运行，
+    # 输出写入各自的缓冲区，流式聊天结束后按测试顺序打印
+    with ThreadPoolExecutor(max_workers=len(buffered_tests)) as executor:
+        futures = [executor.submit(run_buffered, test) for _, test in buffered_tests]
+        stream_passed = test_chat_stream()
+        outcomes = [future.result() for future in futures]
 
-    # 测试获取上下文
-    results.append(("获取上下文", test_context()))
-
-    # 测试同步聊天
-    results.append(("同步聊天", test_chat_sync()))
-
-    # 测试流式聊天
-    results.append(("流式聊天", test_chat_stream()))
+    print()
+    results = []
+    for (name, _), (passed, text) in zip(buffered_tests, outcomes):
+        sys.stdout.write(text)
+        results.append((name, passed))
+    results.append(("流式聊天", stream_passed))
 
     # 汇总结果
     print("\n" + "=" * 50)